@@ -19,6 +19,54 @@ kraken.ketos.linegen
 Command line driver for synthetic recognition training data generation.
 """
 import click
+import logging
+
+logging.captureWarnings(True)
+logger = logging.getLogger('kraken')
+
+# per-process line generator, created by _init_line_generator()
+_lg = None
+
+
+def _init_line_generator(font, font_size, font_weight, language):
+    global _lg
+    from kraken import linegen
+    _lg = linegen.LineGenerator(font, font_size, font_weight, language)
+
+
+def _render_line(task, renormalize, disable_degradation, legacy, alpha, beta,
+                 distort, distortion_sigma):
+    """
+    Renders and degrades a single line with the process-local line generator
+    and returns the PNG-encoded line image.
+    """
+    import io
+    import numpy as np
+    import unicodedata
+
+    from kraken import linegen
+    from kraken.lib.exceptions import KrakenCairoSurfaceException
+
+    idx, line, seed = task
+    # each task carries its own seed so worker processes don't share noise.
+    np.random.seed(seed)
+    logger.info(line)
+    try:
+        if renormalize:
+            im = _lg.render_line(unicodedata.normalize(renormalize, line))
+        else:
+            im = _lg.render_line(line)
+    except KrakenCairoSurfaceException as e:
+        logger.info('{}: {} {}'.format(e.message, e.width, e.height))
+        return idx, line, None
+    if not disable_degradation and not legacy:
+        im = linegen.degrade_line(im, alpha=alpha, beta=beta)
+        im = linegen.distort_line(im, abs(np.random.normal(distort)), abs(np.random.normal(distortion_sigma)))
+    elif legacy:
+        im = linegen.ocropy_degrade(im)
+    fp = io.BytesIO()
+    im.save(fp, format='png')
+    return idx, line, fp.getvalue()
 
 
 @click.command('linegen', deprecated=True)
@@ -61,34 +109,33 @@ import click
               help='Use ocropy-style degradations')
 @click.option('-o', '--output', type=click.Path(), default='training_data',
               help='Output directory')
+@click.option('--workers', show_default=True, default=1, type=click.IntRange(1),
+              help='Number of worker processes rendering lines.')
 @click.argument('text', nargs=-1, type=click.Path(exists=True))
 def line_generator(ctx, font, maxlines, encoding, normalization, renormalize,
                    reorder, font_size, font_weight, language, max_length, strip,
                    disable_degradation, alpha, beta, distort, distortion_sigma,
-                   legacy, output, text):
+                   legacy, output, workers, text):
     """
     Generates artificial text line training data.
     """
     import os
     import errno
-    import logging
     import numpy as np
     import unicodedata
 
     from typing import Set
+    from functools import partial
+    from multiprocessing import Pool
     from bidi.algorithm import get_display
 
     from kraken.lib.progress import KrakenProgressBar
-    from kraken.lib.exceptions import KrakenCairoSurfaceException
 
     from .util import message
 
-    from kraken import linegen
+    from kraken import linegen  # NOQA: fail early if pango/cairo are missing
     from kraken.lib.util import make_printable
 
-    logging.captureWarnings(True)
-    logger = logging.getLogger('kraken')
-
     lines: Set[str] = set()
     if not text:
         return
@@ -98,21 +145,24 @@ def line_generator(ctx, font, maxlines, encoding, normalization, renormalize,
             with click.open_file(t, encoding=encoding) as fp:
                 logger.info('Reading {}'.format(t))
                 for line in fp:
-                    lines.add(line.rstrip('\r\n'))
+                    line = line.rstrip('\r\n')
+                    if normalization:
+                        line = unicodedata.normalize(normalization, line)
+                    if strip:
+                        line = line.strip()
+                    if max_length and len(line) >= max_length:
+                        continue
+                    lines.add(line)
             progress.update(read_task, advance=1)
 
-    if normalization:
-        lines = set([unicodedata.normalize(normalization, line) for line in lines])
-    if strip:
-        lines = set([line.strip() for line in lines])
-    if max_length:
-        lines = set([line for line in lines if len(line) < max_length])
     logger.info('Read {} lines'.format(len(lines)))
     message('Read {} unique lines'.format(len(lines)))
+    # fix the line order as set iteration order depends on the string hash
+    # seed which would make sampling and per-line seeds irreproducible.
+    lines = sorted(lines)
     if maxlines and maxlines < len(lines):
         message('Sampling {} lines\t'.format(maxlines), nl=False)
-        llist = list(lines)
-        lines = set(llist[idx] for idx in np.random.randint(0, len(llist), maxlines))
+        lines = [lines[idx] for idx in sorted(np.random.choice(len(lines), maxlines, replace=False))]
         message('\u2713', fg='green')
     try:
         os.makedirs(output)
@@ -121,9 +171,7 @@ def line_generator(ctx, font, maxlines, encoding, normalization, renormalize,
             raise
 
     # calculate the alphabet and print it for verification purposes
-    alphabet: Set[str] = set()
-    for line in lines:
-        alphabet.update(line)
+    alphabet: Set[str] = set(''.join(lines))
     chars = []
     combining = []
     for char in sorted(alphabet):
@@ -136,28 +184,37 @@ def line_generator(ctx, font, maxlines, encoding, normalization, renormalize,
     message('Symbols: {}'.format(''.join(chars)))
     if combining:
         message('Combining Characters: {}'.format(', '.join(combining)))
-    lg = linegen.LineGenerator(font, font_size, font_weight, language)
+    render_fn = partial(_render_line,
+                        renormalize=renormalize,
+                        disable_degradation=disable_degradation,
+                        legacy=legacy,
+                        alpha=alpha,
+                        beta=beta,
+                        distort=distort,
+                        distortion_sigma=distortion_sigma)
+    seeds = np.random.randint(0, 2**32 - 1, size=len(lines), dtype=np.uint32)
+    tasks = zip(range(len(lines)), lines, seeds)
+    init_args = (font, font_size, font_weight, language)
+
     with KrakenProgressBar() as progress:
         gen_task = progress.add_task('Writing images', total=len(lines), visible=True if not ctx.meta['verbose'] else False)
-        for idx, line in enumerate(lines):
-            logger.info(line)
-            try:
-                if renormalize:
-                    im = lg.render_line(unicodedata.normalize(renormalize, line))
-                else:
-                    im = lg.render_line(line)
-            except KrakenCairoSurfaceException as e:
-                logger.info('{}: {} {}'.format(e.message, e.width, e.height))
-                continue
-            if not disable_degradation and not legacy:
-                im = linegen.degrade_line(im, alpha=alpha, beta=beta)
-                im = linegen.distort_line(im, abs(np.random.normal(distort)), abs(np.random.normal(distortion_sigma)))
-            elif legacy:
-                im = linegen.ocropy_degrade(im)
-            im.save('{}/{:06d}.png'.format(output, idx))
-            with open('{}/{:06d}.gt.txt'.format(output, idx), 'wb') as fp:
-                if reorder:
-                    fp.write(get_display(line).encode('utf-8'))
-                else:
-                    fp.write(line.encode('utf-8'))
-            progress.update(gen_task, advance=1)
+
+        def _write_lines(results):
+            for idx, line, im in results:
+                if im is not None:
+                    with open('{}/{:06d}.png'.format(output, idx), 'wb') as fp:
+                        fp.write(im)
+                    with open('{}/{:06d}.gt.txt'.format(output, idx), 'wb') as fp:
+                        if reorder:
+                            fp.write(get_display(line).encode('utf-8'))
+                        else:
+                            fp.write(line.encode('utf-8'))
+                progress.update(gen_task, advance=1)
+
+        if workers > 1:
+            logger.info(f'Spinning up rendering pool with {workers} workers.')
+            with Pool(workers, initializer=_init_line_generator, initargs=init_args) as pool:
+                _write_lines(pool.imap_unordered(render_fn, tasks, chunksize=16))
+        else:
+            _init_line_generator(*init_args)
+            _write_lines(map(render_fn, tasks))
@@ -93,9 +93,9 @@ logger = logging.getLogger('kraken')
 @click.option('-w', '--weight-decay', show_default=True, type=float,
               default=RECOGNITION_HYPER_PARAMS['weight_decay'], help='Weight decay')
 @click.option('--warmup', show_default=True, type=int,
-              default=RECOGNITION_HYPER_PARAMS['warmup'], help='Number of steps to ramp up to `lrate` initial learning rate.')
+              default=RECOGNITION_HYPER_PARAMS['warmup'], help='Number of steps (batches) to ramp up to `lrate` initial learning rate.')
 @click.option('--freeze-backbone', show_default=True, type=int,
-              default=RECOGNITION_HYPER_PARAMS['freeze_backbone'], help='Number of samples to keep the backbone (everything but last layer) frozen.')
+              default=RECOGNITION_HYPER_PARAMS['freeze_backbone'], help='Number of steps (batches) to keep the backbone (everything but last layer) frozen.')
 @click.option('--schedule',
               show_default=True,
               type=click.Choice(['constant',
@@ -184,6 +184,9 @@ logger = logging.getLogger('kraken')
               show_default=True,
               default=RECOGNITION_HYPER_PARAMS['augment'],
               help='Enable image augmentation')
+@click.option('--compile/--no-compile', 'compile_model', show_default=True, default=False,
+              help='Compiles the network with torch.compile before training. '
+              'Reduces Python overhead at the cost of a longer startup time.')
 @click.option('--logger', 'pl_logger', show_default=True, type=click.Choice(['tensorboard']), default=None,
               help='Logger used by PyTorch Lightning to track metrics such as loss and accuracy.')
 @click.option('--log-dir', show_default=True, type=click.Path(exists=True, dir_okay=True, writable=True),
@@ -196,7 +199,7 @@ def train(ctx, batch_size, pad, output, spec, append, load, freq, quit, epochs,
           normalize_whitespace, codec, resize, reorder, base_dir,
           training_files, evaluation_files, workers, threads, load_hyper_parameters,
           repolygonize, force_binarization, format_type, augment,
-          pl_logger, log_dir, ground_truth):
+          compile_model, pl_logger, log_dir, ground_truth):
     """
     Trains a model from image-text pairs.
     """
@@ -226,7 +229,10 @@ def train(ctx, batch_size, pad, output, spec, append, load, freq, quit, epochs,
 
     import json
     import shutil
-    from kraken.lib.train import RecognitionModel, KrakenTrainer
+    from kraken.lib.train import RecognitionModel, KrakenTrainer, is_compile_supported
+
+    if compile_model and not is_compile_supported():
+        raise click.BadOptionUsage('compile', 'torch.compile is not supported with this Python version or platform.')
 
     hyper_params = RECOGNITION_HYPER_PARAMS.copy()
     hyper_params.update({'freq': freq,
@@ -298,7 +304,8 @@ def train(ctx, batch_size, pad, output, spec, append, load, freq, quit, epochs,
                              force_binarization=force_binarization,
                              format_type=format_type,
                              codec=codec,
-                             resize=resize)
+                             resize=resize,
+                             compile_model=compile_model)
 
     trainer = KrakenTrainer(accelerator=accelerator,
                             devices=device,
@@ -410,7 +417,7 @@ def test(ctx, batch_size, model, evaluation_files, device, pad, workers,
     nn = {}
     for p in model:
         message('Loading model {}\t'.format(p), nl=False)
-        nn[p] = models.load_any(p, device)
+        nn[p] = models.load_any(p, device=device)
         message('\u2713', fg='green')
 
     pin_ds_mem = False
@@ -528,7 +528,8 @@ def segtest(ctx, model, evaluation_files, device, workers, threads, threshold,
             for batch in ds_loader:
                 x, y = batch['image'], batch['target']
                 try:
-                    pred, _ = nn.nn(x)
+                    with torch.no_grad():
+                        pred, _ = nn.nn(x)
                     # scale target to output size
                     y = F.interpolate(y, size=(pred.size(2), pred.size(3))).squeeze(0).bool()
                     pred = pred.squeeze() > threshold
@@ -83,9 +83,8 @@ def extract(ctx, binarize, normalization, normalize_whitespace, reorder,
         text_transforms.append(get_display)
 
     idx = 0
-    manifest = []
 
-    with KrakenProgressBar() as progress:
+    with open('{}/manifest.txt'.format(output), 'w') as manifest, KrakenProgressBar() as progress:
         read_task = progress.add_task('Reading transcriptions', total=len(transcriptions), visible=True if not ctx.meta['verbose'] else False)
 
         for fp in transcriptions:
@@ -110,16 +109,17 @@ def extract(ctx, binarize, normalization, normalize_whitespace, reorder,
                 if binarize:
                     im = binarization.nlbin(im)
                 for line in section.iter('li'):
-                    if line.get('contenteditable') and (not u''.join(line.itertext()).isspace() and u''.join(line.itertext())):
+                    text = ''.join(line.itertext())
+                    if line.get('contenteditable') and (not text.isspace() and text):
                         dest_dict['idx'] = idx
                         dest_dict['uuid'] = str(uuid.uuid4())
                         logger.debug('Writing line {:06d}'.format(idx))
                         l_img = im.crop([int(x) for x in line.get('data-bbox').split(',')])
                         if rotate and td.startswith('vertical'):
-                            im.rotate(90, expand=True)
+                            l_img = l_img.rotate(90, expand=True)
                         l_img.save(('{output}/' + format + '.png').format(**dest_dict))
-                        manifest.append((format + '.png').format(**dest_dict))
-                        text = u''.join(line.itertext()).strip()
+                        manifest.write((format + '.png\n').format(**dest_dict))
+                        text = text.strip()
                         for func in text_transforms:
                             text = func(text)
                         with open(('{output}/' + format + '.gt.txt').format(**dest_dict), 'wb') as t:
@@ -129,8 +129,6 @@ def extract(ctx, binarize, normalization, normalize_whitespace, reorder,
             progress.update(read_task, advance=1)
 
     logger.info('Extracted {} lines'.format(idx))
-    with open('{}/manifest.txt'.format(output), 'w') as fp:
-        fp.write('\n'.join(manifest))
 
 
 @click.command('transcribe', deprecated=True)
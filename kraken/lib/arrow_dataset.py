@@ -198,7 +198,7 @@ def build_binary_dataset(files: Optional[List[Union[str, 'PathLike', Dict]]] = N
 
     callback(0, num_lines)
 
-    for k, v in sorted(alphabet.items(), key=lambda x: x[1], reverse=True):
+    for k, v in alphabet.most_common():
         char = make_printable(k)
         if char == k:
             char = '\t' + char
@@ -77,14 +77,15 @@ RECOGNITION_PRETRAIN_HYPER_PARAMS = {'pad': 16,
 
 RECOGNITION_HYPER_PARAMS = {'pad': 16,
                             'freq': 1.0,
-                            'batch_size': 1,
+                            'batch_size': 32,
                             'quit': 'early',
                             'epochs': -1,
                             'min_epochs': 0,
                             'lag': 10,
                             'min_delta': None,
                             'optimizer': 'Adam',
-                            'lrate': 1e-3,
+                            # 1e-3 * sqrt(batch_size)
+                            'lrate': 5.7e-3,
                             'momentum': 0.9,
                             'weight_decay': 0.0,
                             'schedule': 'constant',
@@ -44,7 +44,8 @@ class TorchSeqRecognizer(object):
             nn: Neural network used for recognition.
             decoder: Decoder function used for mapping softmax activations to
                      labels and positions.
-            train: Enables or disables gradient calculation and dropout.
+            train: Enables or disables dropout. Inference always runs without
+                   gradient calculation.
             device: Device to run model on.
 
         Attributes:
@@ -53,7 +54,8 @@ class TorchSeqRecognizer(object):
 
             decoder: Decoder function used for mapping softmax activations to
                      labels and positions.
-            train: Enables or disables gradient calculation and dropout.
+            train: Enables or disables dropout. Inference always runs without
+                   gradient calculation.
             device: Device to run model on.
             one_channel_mode: flag indicating if the model expects binary or
                               grayscale input images.
@@ -105,8 +107,10 @@ class TorchSeqRecognizer(object):
                                   size 1 in the network output.
         """
         if self.device:
-            line = line.to(self.device)
-        o, olens = self.nn.nn(line, lens)
+            line = line.to(self.device, non_blocking=True)
+        # outputs are converted to numpy arrays so no graph is ever needed
+        with torch.no_grad():
+            o, olens = self.nn.nn(line, lens)
         if o.size(2) != 1:
             raise KrakenInputException('Expected dimension 3 to be 1, actual {}'.format(o.size()))
         self.outputs = o.detach().squeeze(2).cpu().numpy()
@@ -195,7 +199,8 @@ def load_any(fname: Union['PathLike', str],
 
     Args:
         fname: Path to the model
-        train: Enables gradient calculation and dropout layers in model.
+        train: Enables dropout layers in model. Inference always runs without
+               gradient calculation.
         device: Target device
 
     Returns:
@@ -28,7 +28,6 @@ Vogler, Nikolai, et al. "Lacuna Reconstruction: Self-supervised Pre-training
 for Low-Resource Historical Document Transcription." arXiv preprint
 arXiv:2112.08692 (2021).
 """
-import re
 import math
 import torch
 import logging
@@ -311,7 +310,7 @@ class RecognitionPretrainModel(pl.LightningModule):
         # sizes and dimension ordering.
         if not self.nn:
             blocks = spec[1:-1].split(' ')
-            m = re.match(r'(\d+),(\d+),(\d+),(\d+)', blocks[0])
+            m = vgsl.VGSL_INPUT_RE.match(blocks[0])
             if not m:
                 raise ValueError(f'Invalid input spec {blocks[0]}')
             self.batch, self.height, self.width, self.channels = [int(x) for x in m.groups()]
@@ -15,6 +15,8 @@
 """
 Handlers for rich-based progress bars.
 """
+import time
+
 from typing import Union, TYPE_CHECKING
 from dataclasses import dataclass
 
@@ -102,6 +104,15 @@ class KrakenTrainProgressBar(RichProgressBar):
                  *args,
                  **kwargs):
         super().__init__(*args, **kwargs, theme=RichProgressBarTheme())
+        self._last_refresh = 0.0
+
+    def refresh(self) -> None:
+        # redraw at most once a second like KrakenProgressBar instead of after
+        # every batch.
+        now = time.monotonic()
+        if now - self._last_refresh >= 1.0:
+            self._last_refresh = now
+            super().refresh()
 
     def _init_progress(self, trainer):
         if self.is_enabled and (self.progress is None or self._progress_stopped):
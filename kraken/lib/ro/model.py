@@ -60,6 +60,16 @@ class DummyVGSLModel:
         self.ptl_module.save_checkpoint(filename)
 
 
+def _random_split(data: Sequence[Any], partition: float):
+    """
+    Randomly splits `data` into disjoint training and validation lists
+    without modifying the input.
+    """
+    idx = np.random.permutation(len(data))
+    train_len = int(partition*len(data))
+    return [data[i] for i in idx[:train_len]], [data[i] for i in idx[train_len:]]
+
+
 def spearman_footrule_distance(s, t):
     return (s - t).abs().sum() / (0.5 * (len(s) ** 2 - (len(s) % 2)))
 
@@ -97,9 +107,7 @@ class ROModel(pl.LightningModule):
             self.hyper_params.update(hyper_params)
 
         if not evaluation_data:
-            np.random.shuffle(training_data)
-            training_data = training_data[:int(partition*len(training_data))]
-            evaluation_data = training_data[int(partition*len(training_data)):]
+            training_data, evaluation_data = _random_split(training_data, partition)
         train_set = PairWiseROSet(training_data,
                                   mode=format_type,
                                   level=level,
@@ -15,14 +15,17 @@
 """
 Training loop interception helpers
 """
-import re
+import copy
+import math
 import torch
 import logging
 import warnings
+import threading
 import numpy as np
 import torch.nn.functional as F
 import pytorch_lightning as pl
 
+from concurrent.futures import ThreadPoolExecutor
 from torchmetrics.classification import MultilabelAccuracy, MultilabelJaccardIndex
 from torchmetrics.text import CharErrorRate, WordErrorRate
 from torch.optim import lr_scheduler
@@ -58,6 +61,29 @@ def _star_fun(fun, kwargs):
     return None
 
 
+def _threaded_map(fun, iterable, num_workers=1):
+    """
+    Maps `fun` over `iterable` with a thread pool. Meant for parsing training
+    data where most time is spent in I/O and C code releasing the GIL.
+    """
+    with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as pool:
+        return list(pool.map(fun, iterable))
+
+
+def is_compile_supported() -> bool:
+    """
+    Returns whether `torch.compile` can be used with the running interpreter
+    and platform.
+    """
+    try:
+        from torch._dynamo.eval_frame import check_if_dynamo_supported
+        check_if_dynamo_supported()
+    except (ImportError, RuntimeError) as e:
+        logger.debug(f'torch.compile unsupported: {e}')
+        return False
+    return True
+
+
 def _validation_worker_init_fn(worker_id):
     """ Fix random seeds so that augmentation always produces the same
         results when validating. Temporarily increase the logging level
@@ -144,7 +170,7 @@ class KrakenFreezeBackbone(BaseFinetuning):
         pass
 
     def on_train_start(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule") -> None:
-        self.freeze(pl_module.net[:-1])
+        self.freeze(pl_module.nn.nn[:-1])
 
     def on_train_batch_start(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule", batch, batch_idx) -> None:
         """
@@ -153,7 +179,7 @@ class KrakenFreezeBackbone(BaseFinetuning):
         if trainer.global_step == self.unfreeze_at_iteration:
             for opt_idx, optimizer in enumerate(trainer.optimizers):
                 num_param_groups = len(optimizer.param_groups)
-                self.unfreeze_and_add_param_group(modules=pl_module.net[:-1],
+                self.unfreeze_and_add_param_group(modules=pl_module.nn.nn[:-1],
                                                   optimizer=optimizer,
                                                   train_bn=True,)
                 current_param_groups = optimizer.param_groups
@@ -183,7 +209,44 @@ class KrakenSetOneChannelMode(Callback):
 class KrakenSaveModel(Callback):
     """
     Kraken's own serialization callback instead of pytorch's.
+
+    Models are serialized from a snapshot in a background thread so training
+    can continue while the checkpoint is written.
     """
+    def __init__(self):
+        super().__init__()
+        self._save_thread = None
+        self._save_exc = None
+
+    @staticmethod
+    def _cpu_snapshot(nn: vgsl.TorchVGSLModel) -> vgsl.TorchVGSLModel:
+        """
+        Copies a model to the CPU without duplicating its weights on the
+        training device.
+        """
+        memo = {}
+        for module in (nn.nn, nn.aux_layers):
+            for param in module.parameters():
+                memo[id(param)] = torch.nn.Parameter(param.detach().to('cpu', copy=True),
+                                                     requires_grad=param.requires_grad)
+            for buf in module.buffers():
+                memo[id(buf)] = buf.detach().to('cpu', copy=True)
+        return copy.deepcopy(nn, memo)
+
+    def _save(self, nn: vgsl.TorchVGSLModel, path: str) -> None:
+        try:
+            nn.save_model(path)
+        except BaseException as e:
+            self._save_exc = e
+
+    def _wait_for_save(self):
+        if self._save_thread is not None:
+            self._save_thread.join()
+            self._save_thread = None
+        if self._save_exc is not None:
+            exc, self._save_exc = self._save_exc, None
+            raise exc
+
     def on_validation_end(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule") -> None:
         if not trainer.sanity_checking:
             trainer.model.nn.hyper_params['completed_epochs'] += 1
@@ -192,9 +255,21 @@ class KrakenSaveModel(Callback):
             trainer.model.nn.user_metadata['metrics'].append((trainer.global_step, {k: float(v) for k, v in trainer.logged_metrics.items()}))
 
             logger.info('Saving to {}_{}.mlmodel'.format(trainer.model.output, trainer.current_epoch))
-            trainer.model.nn.save_model(f'{trainer.model.output}_{trainer.current_epoch}.mlmodel')
+            self._wait_for_save()
+            path = f'{trainer.model.output}_{trainer.current_epoch}.mlmodel'
+            # lightning checkpoints (reading order models) have to be written
+            # from the training thread.
+            if isinstance(trainer.model.nn, vgsl.TorchVGSLModel):
+                nn = self._cpu_snapshot(trainer.model.nn)
+                self._save_thread = threading.Thread(target=self._save, args=(nn, path))
+                self._save_thread.start()
+            else:
+                trainer.model.nn.save_model(path)
             trainer.model.best_model = f'{trainer.model.output}_{trainer.model.best_epoch}.mlmodel'
 
+    def teardown(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule", stage: str) -> None:
+        self._wait_for_save()
+
 
 class RecognitionModel(pl.LightningModule):
     def __init__(self,
@@ -214,7 +289,8 @@ class RecognitionModel(pl.LightningModule):
                  force_binarization: bool = False,
                  format_type: Literal['path', 'alto', 'page', 'xml', 'binary'] = 'path',
                  codec: Optional[Dict] = None,
-                 resize: Literal['fail', 'both', 'new', 'add', 'union'] = 'fail'):
+                 resize: Literal['fail', 'both', 'new', 'add', 'union'] = 'fail',
+                 compile_model: bool = False):
         """
         A LightningModule encapsulating the training setup for a text
         recognition model.
@@ -266,6 +342,10 @@ class RecognitionModel(pl.LightningModule):
         self.resize = resize
         self.format_type = format_type
         self.output = output
+        if compile_model and not is_compile_supported():
+            logger.warning('torch.compile is not supported on this platform. Training eagerly.')
+            compile_model = False
+        self.compile_model = compile_model
 
         self.best_epoch = -1
         self.best_metric = 0.0
@@ -275,10 +355,10 @@ class RecognitionModel(pl.LightningModule):
         valid_norm = True
         if format_type in ['xml', 'page', 'alto']:
             logger.info(f'Parsing {len(training_data)} XML files for training data')
-            training_data = [{'page': XMLPage(file, format_type).to_container()} for file in training_data]
+            training_data = _threaded_map(lambda x: {'page': XMLPage(x, format_type).to_container()}, training_data, num_workers)
             if evaluation_data:
                 logger.info(f'Parsing {len(evaluation_data)} XML files for validation data')
-                evaluation_data = [{'page': XMLPage(file, format_type).to_container()} for file in evaluation_data]
+                evaluation_data = _threaded_map(lambda x: {'page': XMLPage(x, format_type).to_container()}, evaluation_data, num_workers)
             if binary_dataset_split:
                 logger.warning('Internal binary dataset splits are enabled but using non-binary dataset files. Will be ignored.')
                 binary_dataset_split = False
@@ -304,10 +384,10 @@ class RecognitionModel(pl.LightningModule):
                 logger.warning('Internal binary dataset splits are enabled but using non-binary dataset files. Will be ignored.')
                 binary_dataset_split = False
             logger.info(f'Got {len(training_data)} line strip images for training data')
-            training_data = [{'line': parse_gt_path(im)} for im in training_data]
+            training_data = _threaded_map(lambda x: {'line': parse_gt_path(x)}, training_data, num_workers)
             if evaluation_data:
                 logger.info(f'Got {len(evaluation_data)} line strip images for validation data')
-                evaluation_data = [{'line': parse_gt_path(im)} for im in evaluation_data]
+                evaluation_data = _threaded_map(lambda x: {'line': parse_gt_path(x)}, evaluation_data, num_workers)
             valid_norm = True
         # format_type is None. Determine training type from container class types
         elif not format_type:
@@ -349,7 +429,7 @@ class RecognitionModel(pl.LightningModule):
         # sizes and dimension ordering.
         if not self.nn:
             blocks = spec[1:-1].split(' ')
-            m = re.match(r'(\d+),(\d+),(\d+),(\d+)', blocks[0])
+            m = vgsl.VGSL_INPUT_RE.match(blocks[0])
             if not m:
                 raise ValueError(f'Invalid input spec {blocks[0]}')
             batch, height, width, channels = [int(x) for x in m.groups()]
@@ -409,7 +489,7 @@ class RecognitionModel(pl.LightningModule):
         if alpha_diff_only_val:
             logger.warning(f'alphabet mismatch: chars in validation set only: {alpha_diff_only_val} (not trained)')
         logger.info('grapheme\tcount')
-        for k, v in sorted(train_set.alphabet.items(), key=lambda x: x[1], reverse=True):
+        for k, v in train_set.alphabet.most_common():
             char = make_printable(k)
             if char == k:
                 char = '\t' + char
@@ -473,7 +553,9 @@ class RecognitionModel(pl.LightningModule):
         # height should be 1 by now
         if output.size(2) != 1:
             raise KrakenInputException('Expected dimension 3 to be 1, actual {}'.format(output.size(2)))
-        output = output.squeeze(2)
+        # CTC has no half precision kernels, so compute the loss in fp32 while
+        # the rest of the network runs under mixed precision autocast.
+        output = output.squeeze(2).float()
         # NCW -> WNC
         loss = self.nn.criterion(output.permute(2, 0, 1),  # type: ignore
                                  target,
@@ -618,7 +700,13 @@ class RecognitionModel(pl.LightningModule):
                 self.nn.seg_type = self.train_set.dataset.seg_type
 
             self.rec_nn = models.TorchSeqRecognizer(self.nn, train=None, device=None)
-            self.net = self.nn.nn
+            # only the training forward pass is compiled. self.nn.nn stays the
+            # eager module used for validation, serialization, and checkpoints.
+            if self.compile_model:
+                logger.info('Compiling network with torch.compile')
+                self.net = torch.compile(self.nn.nn)
+            else:
+                self.net = self.nn.nn
 
             torch.set_num_threads(max(self.num_workers, 1))
 
@@ -627,6 +715,7 @@ class RecognitionModel(pl.LightningModule):
                           batch_size=self.hparams.hyper_params['batch_size'],
                           num_workers=self.num_workers,
                           pin_memory=True,
+                          persistent_workers=self.num_workers > 0,
                           shuffle=True,
                           collate_fn=collate_sequences)
 
@@ -658,7 +747,7 @@ class RecognitionModel(pl.LightningModule):
     def configure_optimizers(self):
         return _configure_optimizer_and_lr_scheduler(self.hparams.hyper_params,
                                                      self.nn.nn.parameters(),
-                                                     len_train_set=len(self.train_set),
+                                                     len_train_set=math.ceil(len(self.train_set) / self.hparams.hyper_params['batch_size']),
                                                      loss_tracking_mode='max')
 
     def optimizer_step(self, epoch, batch_idx, optimizer, optimizer_closure):
@@ -769,7 +858,7 @@ class SegmentationModel(pl.LightningModule):
                 raise ValueError(f'VGSL spec "{spec}" not bracketed')
             self.spec = spec
             blocks = spec[1:-1].split(' ')
-            m = re.match(r'(\d+),(\d+),(\d+),(\d+)', blocks[0])
+            m = vgsl.VGSL_INPUT_RE.match(blocks[0])
             if not m:
                 raise ValueError(f'Invalid input spec {blocks[0]}')
             batch, height, width, channels = [int(x) for x in m.groups()]
@@ -1049,6 +1138,7 @@ class SegmentationModel(pl.LightningModule):
         return DataLoader(self.train_set,
                           batch_size=1,
                           num_workers=self.num_workers,
+                          persistent_workers=self.num_workers > 0,
                           shuffle=True,
                           pin_memory=True)
 
@@ -9,6 +9,7 @@ import numpy as np
 
 from PIL import Image
 
+from functools import lru_cache
 from typing import Union, Callable, Optional, Literal, TYPE_CHECKING
 
 from kraken.lib import functional_im_transforms as F_t
@@ -64,6 +65,7 @@ def get_im_str(im: Image.Image) -> str:
     return im.filename if hasattr(im, 'filename') else str(im)
 
 
+@lru_cache(maxsize=65536)
 def is_printable(char: str) -> bool:
     """
     Determines if a chode point is printable/visible when printed.
@@ -83,6 +85,7 @@ def is_printable(char: str) -> bool:
     return unicodedata.category(char) in printable
 
 
+@lru_cache(maxsize=65536)
 def make_printable(char: str) -> str:
     """
     Takes a Unicode code point and return a printable representation of it.
@@ -27,6 +27,9 @@ __all__ = ['TorchVGSLModel']
 
 logger = logging.getLogger(__name__)
 
+# matches the input block `batch,height,width,channels` of a VGSL spec
+VGSL_INPUT_RE = re.compile(r'(\d+),(\d+),(\d+),(\d+)')
+
 
 class VGSLBlock(object):
     def __init__(self, block: str, layer: str, name: str, idx: int):
@@ -151,8 +154,7 @@ class TorchVGSLModel(object):
         spec = spec[1:-1]
         blocks = spec.split(' ')
         self.named_spec.append(blocks[0])
-        pattern = re.compile(r'(\d+),(\d+),(\d+),(\d+)')
-        m = pattern.match(blocks.pop(0))
+        m = VGSL_INPUT_RE.match(blocks.pop(0))
         if not m:
             raise ValueError('Invalid input spec.')
         batch, height, width, channels = [int(x) for x in m.groups()]
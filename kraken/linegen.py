@@ -35,7 +35,7 @@ from scipy.ndimage.filters import gaussian_filter
 from scipy.ndimage.measurements import find_objects
 from scipy.ndimage.morphology import distance_transform_cdt, binary_closing
 
-from scipy.ndimage.interpolation import affine_transform, geometric_transform
+from scipy.ndimage.interpolation import affine_transform, map_coordinates
 from PIL import Image, ImageOps
 
 import logging
@@ -245,6 +245,18 @@ def _draw_on_surface(surface, font, language, text):
     return max(ink_rect.width, logical_rect.width), max(ink_rect.height, logical_rect.height)
 
 
+def _paste_on_canvas(im):
+    """
+    Centers a line image on a white canvas 1.5 times its width and 4 times
+    its height and returns the canvas as an uint8 array.
+    """
+    w, h = im.size
+    canvas = np.full((4*h, int(1.5*w)), 255, dtype=np.uint8)
+    x, y = int((canvas.shape[1] - w) / 2), int((canvas.shape[0] - h) / 2)
+    canvas[y:y+h, x:x+w] = pil2array(im.convert('L'))
+    return canvas
+
+
 def ocropy_degrade(im, distort=1.0, dsigma=20.0, eps=0.03, delta=0.3, degradations=((0.5, 0.0, 0.5, 0.0),)):
     """
     Degrades and distorts a line using the same noise model used by ocropus.
@@ -261,13 +273,10 @@ def ocropy_degrade(im, distort=1.0, dsigma=20.0, eps=0.03, delta=0.3, degradatio
     Returns:
         PIL.Image in mode 'L'
     """
-    w, h = im.size
     # XXX: determine correct output shape from transformation matrices instead
     # of guesstimating.
     logger.debug('Pasting source image into canvas')
-    image = Image.new('L', (int(1.5*w), 4*h), 255)
-    image.paste(im, (int((image.size[0] - w) / 2), int((image.size[1] - h) / 2)))
-    a = pil2array(image.convert('L'))
+    a = _paste_on_canvas(im)
     logger.debug('Selecting degradations')
     (sigma, ssigma, threshold, sthreshold) = degradations[np.random.choice(len(degradations))]
     sigma += (2 * np.random.rand() - 1) * ssigma
@@ -301,10 +310,8 @@ def ocropy_degrade(im, distort=1.0, dsigma=20.0, eps=0.03, delta=0.3, degradatio
         hs *= distort / np.amax(hs)
         ws *= distort / np.amax(ws)
 
-        def _f(p):
-            return (p[0] + hs[p[0], p[1]], p[1] + ws[p[0], p[1]])
-
-        a = geometric_transform(a, _f, output_shape=(h, w), order=1, mode='constant', cval=np.amax(a))
+        ys, xs = np.indices((h, w))
+        a = map_coordinates(a, (ys + hs, xs + ws), order=1, mode='constant', cval=np.amax(a))
     im = array2pil(a).convert('L')
     return im
 
@@ -377,9 +384,7 @@ def distort_line(im, distort=3.0, sigma=10, eps=0.03, delta=0.3):
     # XXX: determine correct output shape from transformation matrices instead
     # of guesstimating.
     logger.debug('Pasting source image into canvas')
-    image = Image.new('L', (int(1.5*w), 4*h), 255)
-    image.paste(im, (int((image.size[0] - w) / 2), int((image.size[1] - h) / 2)))
-    line = pil2array(image.convert('L'))
+    line = _paste_on_canvas(im)
 
     # shear in y direction with factor eps * randn(), scaling with 1 + eps *
     # randn() in x/y axis (all offset at d)
@@ -394,11 +399,9 @@ def distort_line(im, distort=3.0, sigma=10, eps=0.03, delta=0.3):
     hs *= distort/np.amax(hs)
     ws *= distort/np.amax(ws)
 
-    def _f(p):
-        return (p[0] + hs[p[0], p[1]], p[1] + ws[p[0], p[1]])
-
     logger.debug('Performing geometric transformation')
-    im = array2pil(geometric_transform(line, _f, order=1, mode='nearest'))
+    ys, xs = np.indices(line.shape)
+    im = array2pil(map_coordinates(line, (ys + hs, xs + ws), order=1, mode='nearest'))
     logger.debug('Cropping canvas to content box')
     im = im.crop(ImageOps.invert(im).getbbox())
     return im
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import unittest
+import pytest
+
+import numpy as np
+
+from PIL import Image, ImageOps
+from pathlib import Path
+from scipy.ndimage import gaussian_filter, affine_transform, geometric_transform, find_objects
+
+from kraken.lib.util import pil2array, array2pil
+
+linegen = pytest.importorskip('kraken.linegen', reason='pangocairo not available')
+
+thisfile = Path(__file__).resolve().parent
+resources = thisfile / 'resources'
+
+
+def _pil_canvas(im):
+    """
+    Reference canvas construction pasting with PIL.
+    """
+    w, h = im.size
+    image = Image.new('L', (int(1.5*w), 4*h), 255)
+    image.paste(im, (int((image.size[0] - w) / 2), int((image.size[1] - h) / 2)))
+    return pil2array(image.convert('L'))
+
+
+def _reference_distort_line(im, distort=3.0, sigma=10, eps=0.03, delta=0.3):
+    """
+    distort_line with a per-pixel geometric_transform callback.
+    """
+    w, h = im.size
+    line = _pil_canvas(im)
+    m = np.array([[1 + eps * np.random.randn(), 0.0], [eps * np.random.randn(), 1.0 + eps * np.random.randn()]])
+    c = np.array([w/2.0, h/2])
+    d = c - np.dot(m, c) + np.array([np.random.randn() * delta, np.random.randn() * delta])
+    line = affine_transform(line, m, offset=d, order=1, mode='constant', cval=255)
+
+    hs = gaussian_filter(np.random.randn(4*h, int(1.5*w)), sigma)
+    ws = gaussian_filter(np.random.randn(4*h, int(1.5*w)), sigma)
+    hs *= distort/np.amax(hs)
+    ws *= distort/np.amax(ws)
+
+    def _f(p):
+        return (p[0] + hs[p[0], p[1]], p[1] + ws[p[0], p[1]])
+
+    im = array2pil(geometric_transform(line, _f, order=1, mode='nearest'))
+    return im.crop(ImageOps.invert(im).getbbox())
+
+
+def _reference_ocropy_degrade(im, distort=1.0, dsigma=20.0, eps=0.03, delta=0.3, degradations=((0.5, 0.0, 0.5, 0.0),)):
+    """
+    ocropy_degrade with a per-pixel geometric_transform callback.
+    """
+    a = _pil_canvas(im)
+    (sigma, ssigma, threshold, sthreshold) = degradations[np.random.choice(len(degradations))]
+    sigma += (2 * np.random.rand() - 1) * ssigma
+    threshold += (2 * np.random.rand() - 1) * sthreshold
+    a = a * 1.0 / np.amax(a)
+    if sigma > 0.0:
+        a = gaussian_filter(a, sigma)
+    a += np.clip(np.random.randn(*a.shape) * 0.2, -0.25, 0.25)
+    m = np.array([[1 + eps * np.random.randn(), 0.0], [eps * np.random.randn(), 1.0 + eps * np.random.randn()]])
+    w, h = a.shape
+    c = np.array([w / 2.0, h / 2])
+    d = c - np.dot(m, c) + np.array([np.random.randn() * delta, np.random.randn() * delta])
+    a = affine_transform(a, m, offset=d, order=1, mode='constant', cval=a[0, 0])
+    a = np.array(a > threshold, 'f')
+    [[r, c]] = find_objects(np.array(a == 0, 'i'))
+    a = a[r.start - 5:r.stop + 5, c.start - 5:c.stop + 5]
+    if distort > 0:
+        h, w = a.shape
+        hs = np.random.randn(h, w)
+        ws = np.random.randn(h, w)
+        hs = gaussian_filter(hs, dsigma)
+        ws = gaussian_filter(ws, dsigma)
+        hs *= distort / np.amax(hs)
+        ws *= distort / np.amax(ws)
+
+        def _f(p):
+            return (p[0] + hs[p[0], p[1]], p[1] + ws[p[0], p[1]])
+
+        a = geometric_transform(a, _f, output_shape=(h, w), order=1, mode='constant', cval=np.amax(a))
+    return array2pil(a).convert('L')
+
+
+class TestLineGen(unittest.TestCase):
+    """
+    Tests the line degradation and distortion functions against their
+    original per-pixel implementations.
+    """
+    def setUp(self):
+        im = Image.open(resources / '000236.png')
+        self.im = im.resize((im.width // 4, im.height // 4))
+
+    def test_paste_on_canvas(self):
+        """
+        Test that the numpy canvas matches pasting with PIL for all input modes.
+        """
+        for mode in ('L', 'RGB', '1'):
+            im = self.im.convert(mode)
+            canvas = linegen._paste_on_canvas(im)
+            self.assertEqual(canvas.dtype, np.uint8)
+            self.assertTrue(np.array_equal(canvas, _pil_canvas(im)))
+
+    def test_distort_line(self):
+        """
+        Test that distort_line produces the same output as the reference
+        implementation for a fixed seed.
+        """
+        np.random.seed(42)
+        ref = _reference_distort_line(self.im)
+        np.random.seed(42)
+        im = linegen.distort_line(self.im)
+        self.assertEqual(im.mode, 'L')
+        self.assertEqual(im.size, ref.size)
+        self.assertTrue(np.array_equal(pil2array(im), pil2array(ref)))
+
+    def test_ocropy_degrade(self):
+        """
+        Test that ocropy_degrade produces the same output as the reference
+        implementation for a fixed seed.
+        """
+        np.random.seed(42)
+        ref = _reference_ocropy_degrade(self.im)
+        np.random.seed(42)
+        im = linegen.ocropy_degrade(self.im)
+        self.assertEqual(im.mode, 'L')
+        self.assertEqual(im.size, ref.size)
+        self.assertTrue(np.array_equal(pil2array(im), pil2array(ref)))
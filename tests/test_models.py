@@ -33,3 +33,20 @@ class TestModels(unittest.TestCase):
         """
         with raises(KrakenInvalidModelException):
             models.load_any(self.temp.name)
+
+    def test_load_device_eval(self):
+        """
+        Tests that models are loaded onto the requested device in eval mode.
+        """
+        rec = models.load_any(resources / 'model_small.mlmodel', device='cpu')
+        self.assertEqual(rec.device, 'cpu')
+        self.assertFalse(rec.nn.nn.training)
+        for param in rec.nn.nn.parameters():
+            self.assertEqual(param.device.type, 'cpu')
+
+    def test_load_train(self):
+        """
+        Tests that models loaded with `train=True` are in training mode.
+        """
+        rec = models.load_any(resources / 'model_small.mlmodel', train=True)
+        self.assertTrue(rec.nn.nn.training)
@@ -7,6 +7,7 @@ import shapely.geometry as geom
 import numpy as np
 
 from kraken.lib.segmentation import is_in_region, reading_order, topsort
+from kraken.lib.ro.model import _random_split
 
 
 def polygon_slices(polygon: Sequence[Tuple[int, int]]) -> Tuple[slice, slice]:
@@ -212,3 +213,24 @@ class TestReadingOrder(unittest.TestCase):
         partial_sort = np.array([[0, 1, 1], [0, 0, 0], [0, 1, 0]])
         expected = [0, 2, 1]
         self.assertTrue(np.array_equal(topsort(partial_sort), expected))
+
+
+class TestROModelSplit(unittest.TestCase):
+
+    """
+    Test the automatic train/validation split of the reading order trainer.
+    """
+
+    def test_random_split(self):
+        """
+        Test that the split is disjoint, covers the input, and leaves the
+        input untouched.
+        """
+        data = [f'page_{i}.xml' for i in range(20)]
+        orig = data.copy()
+        train, val = _random_split(data, 0.9)
+        self.assertEqual(data, orig)
+        self.assertEqual(len(train), 18)
+        self.assertEqual(len(val), 2)
+        self.assertFalse(set(train) & set(val))
+        self.assertEqual(sorted(train + val), sorted(orig))
@@ -2,14 +2,18 @@
 
 import unittest
 import json
+import threading
+
+import torch
 
 import kraken
 
 from pytest import raises
 from pathlib import Path
 
-from kraken.lib import xml
-from kraken.lib.train import KrakenTrainer, RecognitionModel, SegmentationModel
+from kraken.lib import xml, vgsl
+from kraken.lib.train import (KrakenTrainer, KrakenFreezeBackbone, KrakenSaveModel, RecognitionModel,
+                              SegmentationModel, is_compile_supported)
 from kraken.lib.exceptions import KrakenInputException
 
 thisfile = Path(__file__).resolve().parent
@@ -239,3 +243,71 @@ class TestKrakenTrainer(unittest.TestCase):
                                   evaluation_data=evaluation_data)
         module.setup()
         self.assertIsInstance(module.train_set.dataset.aug, kraken.lib.dataset.recognition.DefaultAugmenter)
+
+    def test_krakentrainer_rec_compile_freeze_backbone(self):
+        """
+        Test that backbone freezing works on a compiled network and that
+        compilation falls back to eager mode where it is unsupported.
+        """
+        training_data = self.box_lines
+        evaluation_data = self.box_lines
+        module = RecognitionModel(format_type='path',
+                                  model=self.model,
+                                  training_data=training_data,
+                                  evaluation_data=evaluation_data,
+                                  resize='union',
+                                  compile_model=True)
+        module.setup('fit')
+        if is_compile_supported():
+            self.assertIsNot(module.net, module.nn.nn)
+        else:
+            self.assertFalse(module.compile_model)
+            self.assertIs(module.net, module.nn.nn)
+        KrakenFreezeBackbone(1).on_train_start(None, module)
+        for layer in module.nn.nn[:-1]:
+            for param in layer.parameters():
+                self.assertFalse(param.requires_grad)
+        for param in module.nn.nn[-1].parameters():
+            self.assertTrue(param.requires_grad)
+
+    def test_krakensavemodel_snapshot(self):
+        """
+        Test that the checkpoint snapshot is a detached CPU copy of the model.
+        """
+        nn = vgsl.TorchVGSLModel.load_model(self.model)
+        snapshot = KrakenSaveModel._cpu_snapshot(nn)
+        for orig, copied in zip(nn.nn.parameters(), snapshot.nn.parameters()):
+            self.assertIsNot(orig, copied)
+            self.assertEqual(copied.device, torch.device('cpu'))
+            self.assertTrue(torch.equal(orig, copied))
+        self.assertEqual(nn.spec, snapshot.spec)
+
+    def test_krakensavemodel_save_error(self):
+        """
+        Test that an exception in the background save thread is reraised.
+        """
+        class _FailingModel(object):
+            def save_model(self, path):
+                raise OSError('disk full')
+
+        callback = KrakenSaveModel()
+        callback._save_thread = threading.Thread(target=callback._save, args=(_FailingModel(), 'model.mlmodel'))
+        callback._save_thread.start()
+        with raises(OSError):
+            callback.teardown(None, None, 'fit')
+        # the exception is only raised once
+        callback._wait_for_save()
+
+    def test_krakentrainer_rec_1cycle_steps_per_epoch(self):
+        """
+        Test that the 1cycle scheduler is sized by batches and not by samples.
+        """
+        training_data = self.box_lines * 5
+        evaluation_data = self.box_lines
+        module = RecognitionModel({'schedule': '1cycle', 'epochs': 3, 'batch_size': 2},
+                                  format_type='path',
+                                  training_data=training_data,
+                                  evaluation_data=evaluation_data)
+        module.setup()
+        sched = module.configure_optimizers()['lr_scheduler']['scheduler']
+        self.assertEqual(sched.total_steps, 3 * 3)